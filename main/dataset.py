@@ -360,7 +360,9 @@ class MaskBaseDataset(Dataset):
     def decode_multi_class(
         multi_class_label,
     ) -> Tuple[MaskLabels, GenderLabels, AgeLabels]:
-        """인코딩된 다중 라벨을 각각의 라벨로 디코딩하는 메서드"""
+        """인코딩된 다중 라벨을 각각의 라벨로 디코딩하는 메서드
+        int 하나 또는 라벨 tensor 를 받으며, tensor 인 경우 batch 전체를 한 번에 디코딩합니다.
+        """
         mask_label = (multi_class_label // 6) % 3
         gender_label = (multi_class_label // 3) % 2
         age_label = multi_class_label % 3
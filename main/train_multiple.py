@@ -1,20 +1,24 @@
 import argparse
-import glob
 import json
 import multiprocessing
 import os
 import random
 import re
+from concurrent.futures import ThreadPoolExecutor
 from importlib import import_module
 from pathlib import Path
 
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 import torch
+import torch.distributed as dist
 import torch.nn as nn
 import torch.nn.functional as F
+from torch.nn.parallel import DistributedDataParallel as DDP
 from torch.optim.lr_scheduler import StepLR
 from torch.utils.data import DataLoader
+from torch.utils.data.distributed import DistributedSampler
 from torch.utils.tensorboard import SummaryWriter
 import torchvision.models as models
 
@@ -24,12 +28,15 @@ from loss import create_criterion
 from accuracy_loss_print import AccuracyLoss
 
 
-def seed_everything(seed):
+def seed_everything(seed, deterministic=False):
     torch.manual_seed(seed)
     torch.cuda.manual_seed(seed)
     torch.cuda.manual_seed_all(seed)  # if use multi-GPU
-    torch.backends.cudnn.deterministic = True
-    torch.backends.cudnn.benchmark = False
+    # 입력 크기가 고정이므로 benchmark 모드로 가장 빠른 conv 알고리즘을 찾아 캐싱합니다.
+    torch.backends.cudnn.deterministic = deterministic
+    torch.backends.cudnn.benchmark = not deterministic
+    if not deterministic:
+        torch.set_float32_matmul_precision("high")  # Ampere 이상에서 TF32 사용
     np.random.seed(seed)
     random.seed(seed)
 
@@ -44,20 +51,22 @@ def grid_image(np_images, gts, preds, n=16, shuffle=False):
     assert n <= batch_size
 
     choices = random.choices(range(batch_size), k=n) if shuffle else list(range(n))
-    figure = plt.figure(
+    # pyplot 전역 상태를 쓰지 않는 object API 로 만들어 학습 thread 밖에서도 안전하게 생성합니다.
+    figure = Figure(
         figsize=(12, 18 + 2)
     )  # cautions: hardcoded, 이미지 크기에 따라 figsize 를 조정해야 할 수 있습니다. T.T
-    plt.subplots_adjust(
+    figure.subplots_adjust(
         top=0.8
     )  # cautions: hardcoded, 이미지 크기에 따라 top 를 조정해야 할 수 있습니다. T.T
     n_grid = int(np.ceil(n**0.5))
     tasks = ["mask", "gender", "age"]
-    for idx, choice in enumerate(choices):
-        gt = gts[choice].item()
-        pred = preds[choice].item()
+    # 선택된 샘플의 라벨을 한 번에 디코딩합니다.
+    gts_decoded = zip(*(t.tolist() for t in MaskBaseDataset.decode_multi_class(gts[choices])))
+    preds_decoded = zip(*(t.tolist() for t in MaskBaseDataset.decode_multi_class(preds[choices])))
+    for idx, (choice, gt_decoded_labels, pred_decoded_labels) in enumerate(
+        zip(choices, gts_decoded, preds_decoded)
+    ):
         image = np_images[choice]
-        gt_decoded_labels = MaskBaseDataset.decode_multi_class(gt)
-        pred_decoded_labels = MaskBaseDataset.decode_multi_class(pred)
         title = "\n".join(
             [
                 f"{task} - gt: {gt_label}, pred: {pred_label}"
@@ -67,15 +76,26 @@ def grid_image(np_images, gts, preds, n=16, shuffle=False):
             ]
         )
 
-        plt.subplot(n_grid, n_grid, idx + 1, title=title)
-        plt.xticks([])
-        plt.yticks([])
-        plt.grid(False)
-        plt.imshow(image, cmap=plt.cm.binary)
+        ax = figure.add_subplot(n_grid, n_grid, idx + 1, title=title)
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.grid(False)
+        ax.imshow(image, cmap="binary")
 
     return figure
 
 
+def render_grid_image(*args, **kwargs):
+    """Build the grid_image figure and render it with Agg.
+
+    Returns:
+        np.ndarray: HWC uint8 RGB image of the rendered figure.
+    """
+    canvas = FigureCanvasAgg(grid_image(*args, **kwargs))
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())[..., :3].copy()
+
+
 def increment_path(path, exist_ok=False):
     """Automatically increment path, i.e. runs/exp --> runs/exp0, runs/exp1 etc.
 
@@ -87,21 +107,134 @@ def increment_path(path, exist_ok=False):
     if (path.exists() and exist_ok) or (not path.exists()):
         return str(path)
     else:
-        dirs = glob.glob(f"{path}*")
-        matches = [re.search(rf"%s(\d+)" % path.stem, d) for d in dirs]
-        i = [int(m.groups()[0]) for m in matches if m]
+        pattern = re.compile(rf"{re.escape(path.name)}(\d+)")
+        with os.scandir(path.parent) as entries:
+            matches = [pattern.fullmatch(e.name) for e in entries if e.is_dir()]
+        i = [int(m.group(1)) for m in matches if m]
         n = max(i) + 1 if i else 2
         return f"{path}{n}"
 
 
-def train(data_dir, model_dir, args):
-    seed_everything(args.seed)
+def unwrap_model(model):
+    """Return the bare module of a torch.compile / DistributedDataParallel wrapped model."""
+    model = getattr(model, "_orig_mod", model)
+    return model.module if isinstance(model, DDP) else model
+
+
+def compile_model(model, use_cuda):
+    """Wrap `model` with torch.compile (PyTorch 2.x), keep eager mode on older versions.
+
+    torch.compile is lazy: backend errors (no Triton, no C++ toolchain, ...) are raised
+    on the first forward call, not here.
+    """
+    if not hasattr(torch, "compile"):
+        print("[Warning] torch.compile is not available in this PyTorch version, using eager mode")
+        return model
+    # reduce-overhead 는 CUDA graph 를 사용하므로 GPU 에서만 씁니다.
+    return torch.compile(model, mode="reduce-overhead" if use_cuda else "default")
+
+
+def _state_to_cpu(state):
+    if isinstance(state, torch.Tensor):
+        return state.detach().to("cpu", copy=True)
+    if isinstance(state, dict):
+        # OrderedDict 타입과 load_state_dict 가 사용하는 _metadata 를 그대로 유지합니다.
+        cpu_state = type(state)((k, _state_to_cpu(v)) for k, v in state.items())
+        if hasattr(state, "_metadata"):
+            cpu_state._metadata = state._metadata
+        return cpu_state
+    return state
+
+
+def save_checkpoint_async(executor, state, paths):
+    """Snapshot `state` to CPU and torch.save it to every path on `executor`.
+
+    The snapshot is taken before returning, so the next training steps can
+    update the weights while the file is written.
+
+    Args:
+        executor (ThreadPoolExecutor): single-worker executor that writes the files.
+        state (dict): checkpoint dict (state_dicts, epoch, ...).
+        paths (list of str): files to write the same checkpoint to.
+
+    Returns:
+        concurrent.futures.Future: call .result() to wait and re-raise any save error.
+    """
+    state = _state_to_cpu(state)
+
+    def _save():
+        for path in paths:
+            torch.save(state, path, pickle_protocol=5)
+
+    return executor.submit(_save)
+
+
+class DataPrefetcher:
+    """Wrap a DataLoader and copy the next batch to the device on a side CUDA stream.
+
+    The host-to-device copy of batch i+1 overlaps with the compute of batch i.
+    Batches are yielded already on `device`; without CUDA it falls back to a plain copy.
+
+    Args:
+        loader (DataLoader): loader created with pin_memory=True.
+        device (torch.device): device the batches are copied to.
+    """
+
+    def __init__(self, loader, device):
+        self.loader = loader
+        self.device = device
+
+    def __len__(self):
+        return len(self.loader)
+
+    def __iter__(self):
+        if self.device.type != "cuda":
+            for batch in self.loader:
+                yield tuple(t.to(self.device) for t in batch)
+            return
+
+        stream = torch.cuda.Stream()
+        loader_iter = iter(self.loader)
+        next_batch = self._preload(loader_iter, stream)
+        while next_batch is not None:
+            torch.cuda.current_stream().wait_stream(stream)
+            batch = next_batch
+            for t in batch:
+                t.record_stream(torch.cuda.current_stream())
+            next_batch = self._preload(loader_iter, stream)
+            yield batch
+
+    def _preload(self, loader_iter, stream):
+        try:
+            batch = next(loader_iter)
+        except StopIteration:
+            return None
+        with torch.cuda.stream(stream):
+            return tuple(t.to(self.device, non_blocking=True) for t in batch)
 
-    save_dir = increment_path(os.path.join(model_dir, args.name))
+
+def train(data_dir, model_dir, args):
+    seed_everything(args.seed, args.deterministic)
 
     # -- settings
     use_cuda = torch.cuda.is_available()
-    device = torch.device("cuda" if use_cuda else "cpu")
+    # torchrun --nproc_per_node=N 으로 실행하면 LOCAL_RANK 가 설정되어 GPU 당 한 프로세스로 학습합니다.
+    local_rank = int(os.environ.get("LOCAL_RANK", -1))
+    distributed = local_rank != -1
+    if distributed:
+        dist.init_process_group("nccl")
+        torch.cuda.set_device(local_rank)
+        device = torch.device("cuda", local_rank)
+    else:
+        device = torch.device("cuda" if use_cuda else "cpu")
+    is_main_process = not distributed or dist.get_rank() == 0
+
+    save_dir = increment_path(os.path.join(model_dir, args.name))
+    if distributed:
+        # 모든 rank 가 rank 0 과 같은 save_dir 을 사용하도록 맞춰줍니다.
+        save_dir_list = [save_dir]
+        dist.broadcast_object_list(save_dir_list, src=0)
+        save_dir = save_dir_list[0]
 
     # -- dataset
     dataset_module = getattr(
@@ -125,23 +258,36 @@ def train(data_dir, model_dir, args):
 
     # -- data_loader
     train_set, val_set = dataset.split_dataset()
+    train_sampler = DistributedSampler(train_set, shuffle=True) if distributed else None
+    # DistributedSampler 는 rank 간 길이를 맞추려고 중복 샘플을 채우므로, validation 은 중복 없이 rank 별로 나눕니다.
+    val_sampler = (
+        range(dist.get_rank(), len(val_set), dist.get_world_size()) if distributed else None
+    )
+    # worker 를 너무 많이 두면 I/O 경합이 생기므로 최대 8개까지만 사용합니다.
+    num_workers = min(8, multiprocessing.cpu_count() // 2)
+    # worker 가 없으면 두 옵션 모두 DataLoader 에 넘기지 않습니다 (torch 버전마다 허용 값이 다름).
+    loader_kwargs = dict(persistent_workers=True, prefetch_factor=4) if num_workers > 0 else {}
 
     train_loader = DataLoader(
         train_set,
         batch_size=args.batch_size,
-        num_workers=multiprocessing.cpu_count() // 2,
-        shuffle=True,
+        num_workers=num_workers,
+        shuffle=train_sampler is None,
         pin_memory=use_cuda,
         drop_last=True,
+        sampler=train_sampler,
+        **loader_kwargs,
     )
 
     val_loader = DataLoader(
         val_set,
         batch_size=args.valid_batch_size,
-        num_workers=multiprocessing.cpu_count() // 2,
+        num_workers=num_workers,
         shuffle=False,
         pin_memory=use_cuda,
-        drop_last=True,
+        drop_last=False,
+        sampler=val_sampler,
+        **loader_kwargs,
     )
 
     # -- model
@@ -149,7 +295,14 @@ def train(data_dir, model_dir, args):
     model_age = model_module(num_classes=3).to(device)
     model_mask = model_module(num_classes=3).to(device)
     model_gender = model_module(num_classes=2).to(device)
-
+    if distributed:
+        model_age = DDP(model_age, device_ids=[local_rank])
+        model_mask = DDP(model_mask, device_ids=[local_rank])
+        model_gender = DDP(model_gender, device_ids=[local_rank])
+    if args.compile:
+        model_age = compile_model(model_age, use_cuda)
+        model_mask = compile_model(model_mask, use_cuda)
+        model_gender = compile_model(model_gender, use_cuda)
 
     # -- loss & metric
     criterion_age = create_criterion(args.criterion_age)  # default: cross_entropy
@@ -174,72 +327,84 @@ def train(data_dir, model_dir, args):
     scheduler_age = StepLR(optimizer_age, args.lr_decay_step, gamma=0.5)
     scheduler_mask = StepLR(optimizer_mask, args.lr_decay_step, gamma=0.5)   
     scheduler_gender = StepLR(optimizer_gender, args.lr_decay_step, gamma=0.5)
+    # 세 모델이 하나의 GradScaler 를 공유하고, step 마다 update 는 한 번만 호출합니다.
+    scaler = torch.cuda.amp.GradScaler(enabled=use_cuda)
 
     # -- logging
-    logger = SummaryWriter(log_dir=save_dir)
-    with open(os.path.join(save_dir, "config.json"), "w", encoding="utf-8") as f:
-        json.dump(vars(args), f, ensure_ascii=False, indent=4)
+    if is_main_process:
+        logger = SummaryWriter(log_dir=save_dir)
+        with open(os.path.join(save_dir, "config.json"), "w", encoding="utf-8") as f:
+            json.dump(vars(args), f, ensure_ascii=False, indent=4)
 
     best_val_acc = 0
     best_val_loss = np.inf
+    save_last_interval = args.save_last_interval or args.epochs
+    save_executor = ThreadPoolExecutor(max_workers=1)
+    save_future = None
+    # figure 생성과 Agg 렌더링은 학습 thread 밖에서 진행합니다.
+    figure_executor = ThreadPoolExecutor(max_workers=1)
     for epoch in range(args.epochs):
-        torch.cuda.empty_cache()
+        if train_sampler is not None:
+            train_sampler.set_epoch(epoch)
         # train loop
         model_age.train()
         model_mask.train()
         model_gender.train()
-        loss_val_age = 0
-        loss_val_mask = 0
-        loss_val_gender = 0
-        matches = 0
-        for idx, train_batch in enumerate(train_loader):
+        # .item() 동기화를 log_interval 마다 한 번만 하도록 device 위에서 누적합니다.
+        loss_val_age = torch.zeros((), device=device)
+        loss_val_mask = torch.zeros((), device=device)
+        loss_val_gender = torch.zeros((), device=device)
+        matches = torch.zeros((), dtype=torch.long, device=device)
+        for idx, train_batch in enumerate(DataPrefetcher(train_loader, device)):
             inputs, labels = train_batch
             mask_label,gender_label, age_label = MaskBaseDataset.decode_multi_class(labels)
             
-            inputs = inputs.to(device)
-            age_label,mask_label,gender_label = torch.tensor(age_label).to(device),torch.tensor(mask_label).to(device),torch.tensor(gender_label).to(device)
-            
             ###age###
-            optimizer_age.zero_grad()
+            optimizer_age.zero_grad(set_to_none=True)
 
-            logits = model_age(inputs)
+            with torch.autocast(device_type="cuda", dtype=torch.float16, enabled=use_cuda):
+                logits = model_age(inputs)
+                loss_age = criterion_age(logits, age_label)
             preds_age = torch.argmax(logits, dim=-1)
-            loss_age = criterion_age(logits, age_label)
 
-            loss_age.backward()
-            optimizer_age.step()
+            scaler.scale(loss_age).backward()
+            scaler.step(optimizer_age)
             
             ###mask###
-            optimizer_mask.zero_grad()
+            optimizer_mask.zero_grad(set_to_none=True)
 
-            logits = model_mask(inputs)
+            with torch.autocast(device_type="cuda", dtype=torch.float16, enabled=use_cuda):
+                logits = model_mask(inputs)
+                loss_mask = criterion_mask(logits, mask_label)
             preds_mask = torch.argmax(logits, dim=-1)
-            loss_mask = criterion_mask(logits, mask_label)
 
-            loss_mask.backward()
-            optimizer_mask.step()
+            scaler.scale(loss_mask).backward()
+            scaler.step(optimizer_mask)
             
             ###gender###
-            optimizer_gender.zero_grad()
+            optimizer_gender.zero_grad(set_to_none=True)
 
-            logits = model_gender(inputs)
+            with torch.autocast(device_type="cuda", dtype=torch.float16, enabled=use_cuda):
+                logits = model_gender(inputs)
+                loss_gender = criterion_gender(logits, gender_label)
             preds_gender = torch.argmax(logits, dim=-1)
-            loss_gender = criterion_gender(logits, gender_label)
 
-            loss_gender.backward()
-            optimizer_gender.step()
+            scaler.scale(loss_gender).backward()
+            scaler.step(optimizer_gender)
+
+            scaler.update()
             
 
-            loss_val_age += loss_age.item()
-            loss_val_mask += loss_mask.item()
-            loss_val_gender += loss_gender.item()
+            loss_val_age += loss_age.detach()
+            loss_val_mask += loss_mask.detach()
+            loss_val_gender += loss_gender.detach()
             correct_predictions = (preds_age == age_label) & (preds_mask == mask_label) & (preds_gender == gender_label)
-            matches += correct_predictions.sum().item()
-            if (idx + 1) % args.log_interval == 0:
-                train_loss_age = loss_val_age / args.log_interval
-                train_loss_mask = loss_val_mask / args.log_interval
-                train_loss_gender = loss_val_gender / args.log_interval
-                train_acc = matches / args.batch_size / args.log_interval
+            matches += correct_predictions.sum()
+            if (idx + 1) % args.log_interval == 0 and is_main_process:
+                train_loss_age = loss_val_age.item() / args.log_interval
+                train_loss_mask = loss_val_mask.item() / args.log_interval
+                train_loss_gender = loss_val_gender.item() / args.log_interval
+                train_acc = matches.item() / args.batch_size / args.log_interval
                 current_lr = get_lr(optimizer_age)
                 print(
                     f"Epoch[{epoch}/{args.epochs}]({idx + 1}/{len(train_loader)}) || "
@@ -252,93 +417,114 @@ def train(data_dir, model_dir, args):
                     "Train/accuracy", train_acc, epoch * len(train_loader) + idx
                 )
 
-                loss_val_age =0
-                loss_val_mask=0
-                loss_val_gender=0
-                matches = 0
+            if (idx + 1) % args.log_interval == 0:
+                loss_val_age.zero_()
+                loss_val_mask.zero_()
+                loss_val_gender.zero_()
+                matches.zero_()
 
         scheduler_age.step()
         scheduler_mask.step()
         scheduler_gender.step()
 
         # val loop
-        with torch.no_grad():
+        with torch.inference_mode():
             print("Calculating validation results...")
             model_age.eval()
             model_mask.eval()
             model_gender.eval()
-            val_loss_items_age = []
-            val_loss_items_mask = []
-            val_loss_items_gender = []
-            val_acc_items = []
-            figure = None
-            for val_batch in val_loader:
+            # [age loss, mask loss, gender loss, 정답 수] 를 device 위에서 누적합니다.
+            val_stats = torch.zeros(4, dtype=torch.float64, device=device)
+            val_batches = 0
+            val_samples = 0
+            figure_future = None
+            log_figure = is_main_process and epoch % args.figure_interval == 0
+            for val_batch in DataPrefetcher(val_loader, device):
                 inputs, labels = val_batch
                 mask_label,gender_label, age_label = MaskBaseDataset.decode_multi_class(labels)
-                
-                inputs = inputs.to(device)
-                age_label,mask_label,gender_label = torch.tensor(age_label).to(device),torch.tensor(mask_label).to(device),torch.tensor(gender_label).to(device)
 
-                logits_age, logits_mask, logits_gender = model_age(inputs),model_mask(inputs),model_gender(inputs)
+                with torch.autocast(device_type="cuda", dtype=torch.float16, enabled=use_cuda):
+                    logits_age, logits_mask, logits_gender = model_age(inputs),model_mask(inputs),model_gender(inputs)
+                    loss_item_age, loss_item_mask, loss_item_gender = criterion_age(logits_age, age_label),criterion_mask(logits_mask, mask_label),criterion_gender(logits_gender, gender_label)
                 preds_age,preds_mask,preds_gender = torch.argmax(logits_age, dim=-1),torch.argmax(logits_mask, dim=-1),torch.argmax(logits_gender, dim=-1)
-
-                loss_item_age, loss_item_mask, loss_item_gender = criterion_age(logits_age, age_label).item(),criterion_mask(logits_mask, mask_label).item(),criterion_gender(logits_gender, gender_label).item()
                 acc=(age_label==preds_age) & (mask_label==preds_mask) & (gender_label==preds_gender)
-                acc_item = acc.sum().item()
-                val_loss_items_age.append(loss_item_age)
-                val_loss_items_mask.append(loss_item_mask)
-                val_loss_items_gender.append(loss_item_gender)
-                val_acc_items.append(acc_item)
+                val_stats += torch.stack(
+                    [loss_item_age.double(), loss_item_mask.double(), loss_item_gender.double(), acc.sum().double()]
+                )
+                val_batches += 1
+                val_samples += len(labels)
                 
                 preds=MaskBaseDataset.encode_multi_class(preds_mask,preds_gender,preds_age)
 
-                if figure is None:
+                if figure_future is None and log_figure:
                     inputs_np = (
                         torch.clone(inputs).detach().cpu().permute(0, 2, 3, 1).numpy()
                     )
                     inputs_np = dataset_module.denormalize_image(
                         inputs_np, dataset.mean, dataset.std
                     )
-                    figure = grid_image(
+                    figure_future = figure_executor.submit(
+                        render_grid_image,
                         inputs_np,
-                        labels,
-                        preds,
+                        labels.cpu(),
+                        preds.cpu(),
                         n=16,
                         shuffle=args.dataset != "MaskSplitByProfileDataset",
                     )
 
-            val_loss_age = np.sum(val_loss_items_age) / len(val_loader)
-            val_loss_mask = np.sum(val_loss_items_mask) / len(val_loader)
-            val_loss_gender = np.sum(val_loss_items_gender) / len(val_loader)
+            val_stats = torch.cat(
+                [val_stats, torch.tensor([val_batches, val_samples], dtype=torch.float64, device=device)]
+            )
+            if distributed:
+                # 각 rank 가 나눠서 계산한 validation 결과와 실제로 평가한 batch / 샘플 수를 합칩니다.
+                dist.all_reduce(val_stats)
+            val_loss_age, val_loss_mask, val_loss_gender, val_matches, val_batches, val_samples = val_stats.tolist()
+            val_loss_age /= val_batches
+            val_loss_mask /= val_batches
+            val_loss_gender /= val_batches
             
             val_loss = loss_mask + loss_age + loss_gender
             
-            val_acc = np.sum(val_acc_items) / len(val_set)
+            val_acc = val_matches / val_samples
             best_val_loss = min(best_val_loss, (val_loss_age+val_loss_mask+val_loss_gender)/3)
+            if not is_main_process:
+                continue
+            save_paths = []
             if val_acc > best_val_acc:
                 print(
                     f"New best model for val accuracy : {val_acc:4.2%}! saving the best model.."
                 )
-                torch.save({
-                    'model_age': model_age.state_dict(),  
-                    'model_mask': model_mask.state_dict(),
-                    'model_gender': model_gender.state_dict(),
-                    }, f"{save_dir}/best.pth")
+                save_paths.append(f"{save_dir}/best.pth")
                 best_val_acc = val_acc
-            torch.save({
-                    'model_age': model_age.state_dict(),  
-                    'model_mask': model_mask.state_dict(),
-                    'model_gender': model_gender.state_dict(),
-                    }, f"{save_dir}/last.pth")
+            if (epoch + 1) % save_last_interval == 0 or epoch == args.epochs - 1:
+                save_paths.append(f"{save_dir}/last.pth")
+            if save_paths:
+                if save_future is not None:
+                    save_future.result()
+                save_future = save_checkpoint_async(save_executor, {
+                    'epoch': epoch,
+                    'model_age': unwrap_model(model_age).state_dict(),  
+                    'model_mask': unwrap_model(model_mask).state_dict(),
+                    'model_gender': unwrap_model(model_gender).state_dict(),
+                    'accuracy': val_acc,
+                    }, save_paths)
             print(
                 f"[Val] acc : {val_acc:4.2%}, age loss: {val_loss_age:4.2} || val loss: {val_loss_mask:4.2} || gender loss: {val_loss_gender:4.2} "
                 f"best acc : {best_val_acc:4.2%}, best loss: {best_val_loss:4.2}"
             )
             logger.add_scalar("Val/loss", val_loss, epoch)
             logger.add_scalar("Val/accuracy", val_acc, epoch)
-            logger.add_figure("results", figure, epoch)
+            if figure_future is not None:
+                logger.add_image("results", figure_future.result(), epoch, dataformats="HWC")
             print()
 
+    if save_future is not None:
+        save_future.result()
+    save_executor.shutdown()
+    figure_executor.shutdown()
+    if distributed:
+        dist.destroy_process_group()
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -350,6 +536,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--seed", type=int, default=42, help="random seed (default: 42)"
     )
+    parser.add_argument(
+        "--deterministic",
+        action="store_true",
+        help="use deterministic cuDNN algorithms for reproducibility (default: False)",
+    )
     parser.add_argument(
         "--epochs", type=int, default=10, help="number of epochs to train (default: 10)"
     )
@@ -432,6 +623,23 @@ if __name__ == "__main__":
     parser.add_argument(
         "--name", default="exp", help="model save at {SM_MODEL_DIR}/{name}"
     )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="compile the models with torch.compile, PyTorch 2.x only (default: False)",
+    )
+    parser.add_argument(
+        "--figure_interval",
+        type=int,
+        default=1,
+        help="how many epochs to wait before logging validation result figure (default: 1)",
+    )
+    parser.add_argument(
+        "--save_last_interval",
+        type=int,
+        default=None,
+        help="how many epochs to wait before saving last.pth (default: only at the last epoch)",
+    )
 
     # Container environment
     parser.add_argument(
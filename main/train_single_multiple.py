@@ -187,7 +187,8 @@ def train(data_dir, model_dir, args):
         optimizer.load_state_dict(model_data['optimizer_state_dict'])
         start_epoch = model_data['epoch'] + 1
     
-    torch.autograd.set_detect_anomaly(True)
+    if args.detect_anomaly:
+        torch.autograd.set_detect_anomaly(True)
     for epoch in range(start_epoch, args.epochs):
         torch.cuda.empty_cache()
         # train loop
@@ -198,10 +199,9 @@ def train(data_dir, model_dir, args):
         matches = 0
         for idx, train_batch in enumerate(train_loader):
             inputs, labels = train_batch
+            inputs = inputs.to(device, non_blocking=True)
+            labels = labels.to(device, non_blocking=True)
             mask_label,gender_label, age_label = MaskBaseDataset.decode_multi_class(labels)
-            
-            inputs = inputs.to(device)
-            age_label,mask_label,gender_label = torch.tensor(age_label).to(device),torch.tensor(mask_label).to(device),torch.tensor(gender_label).to(device)
 
             optimizer.zero_grad()
 
@@ -266,10 +266,9 @@ def train(data_dir, model_dir, args):
             figure = None
             for val_batch in val_loader:
                 inputs, labels = val_batch
+                inputs = inputs.to(device, non_blocking=True)
+                labels = labels.to(device, non_blocking=True)
                 mask_label,gender_label, age_label = MaskBaseDataset.decode_multi_class(labels)
-                
-                inputs = inputs.to(device)
-                age_label,mask_label,gender_label = torch.tensor(age_label).to(device),torch.tensor(mask_label).to(device),torch.tensor(gender_label).to(device)
 
                 outs_age,outs_mask,outs_gender = model(inputs)
                 preds_age,preds_mask,preds_gender = torch.argmax(outs_age, dim=-1),torch.argmax(outs_mask, dim=-1),torch.argmax(outs_gender, dim=-1)
@@ -455,6 +454,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--name", default="exp", help="model save at {SM_MODEL_DIR}/{name}"
     )
+    parser.add_argument(
+        "--detect_anomaly",
+        action="store_true",
+        help="enable autograd anomaly detection for NaN debugging, slows training (default: False)",
+    )
 
     # Container environment
     parser.add_argument(